@@ -0,0 +1,100 @@
+"""Micro-benchmark of per-request serialization CPU: Pydantic models + FastAPI encoder vs. the orjson fast path.
+
+Run with ``python -m api.benchmark``; rows come from an in-memory SQLite table shaped like the
+``/api/search/messages`` and ``/api/channels/{channel}/activity`` results, so no warehouse is needed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Date, DateTime, create_engine, text
+
+from .compression import CompressionMiddleware
+from .responses import FastJSONResponse, rows_to_dicts
+from .schemas import ChannelActivityPoint, MessageOut
+
+
+WORDS = ["paracetamol", "500mg", "ETB", "delivery", "original", "በአዲስ", "አበባ"]
+
+
+def _sample_rows(count: int) -> tuple[list, list]:
+    rng = random.Random(8)
+    engine = create_engine("sqlite://")
+    start = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text("create table messages (message_id, channel_name, message_text, message_date, view_count)"))
+        conn.execute(
+            text(
+                "insert into messages values (:message_id, :channel_name, :message_text, :message_date, :view_count)"
+            ),
+            [
+                {
+                    "message_id": idx,
+                    "channel_name": "lobelia4cosmetics",
+                    "message_text": " ".join(rng.choice(WORDS) for _ in range(60)),
+                    "message_date": start + timedelta(days=idx),
+                    "view_count": rng.randint(100, 50000),
+                }
+                for idx in range(count)
+            ],
+        )
+        messages = conn.execute(text("select * from messages").columns(message_date=DateTime)).fetchall()
+        trend = conn.execute(
+            text(
+                "select date(message_date) as date, count(*) as posts, avg(view_count) as avg_views "
+                "from messages group by 1"
+            ).columns(date=Date)
+        ).fetchall()
+    return messages, trend
+
+
+def _pydantic_path(model: type, rows: list) -> bytes:
+    adapter = TypeAdapter(List[model])
+    objects = [model(**row._mapping) for row in rows]
+    return JSONResponse(jsonable_encoder(adapter.validate_python(objects))).body
+
+
+def _fast_path(rows: list) -> bytes:
+    return FastJSONResponse(rows_to_dicts(rows)).body
+
+
+def _cpu_per_call(func: Callable[[], bytes], iterations: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare API serialization CPU per request")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per response (search_messages caps at 100)")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    messages, trend = _sample_rows(args.rows)
+    compressor = CompressionMiddleware(app=None)  # type: ignore[arg-type]
+    cases = (("search_messages", MessageOut, messages), ("activity trend", ChannelActivityPoint, trend))
+    for name, model, rows in cases:
+        baseline = _pydantic_path(model, rows)
+        fast = _fast_path(rows)
+        assert baseline == fast, f"{name}: payloads differ"
+        slow_cpu = _cpu_per_call(lambda: _pydantic_path(model, rows), args.iterations)
+        fast_cpu = _cpu_per_call(lambda: _fast_path(rows), args.iterations)
+        print(
+            f"{name:16s} pydantic {slow_cpu * 1e6:8.1f} us  orjson {fast_cpu * 1e6:8.1f} us  "
+            f"saved {(slow_cpu - fast_cpu) * 1e6:8.1f} us/request ({slow_cpu / fast_cpu:.1f}x)  "
+            f"bytes {len(fast)} -> gzip {len(compressor.compress(fast, 'gzip'))}"
+            f" / br {len(compressor.compress(fast, 'br'))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` over ``gzip`` from an Accept-Encoding header, honouring ``q=0`` exclusions."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            offered[token.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Brotli/gzip compression for buffered responses of at least ``minimum_size`` bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            # Streaming responses and small or already-encoded bodies go out untouched.
+            if not message.get("more_body") and len(body) >= self.minimum_size and "content-encoding" not in headers:
+                body = self.compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -6,9 +6,10 @@ from fastapi import Depends, FastAPI, HTTPException, Query
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from .compression import CompressionMiddleware
 from .database import get_db
+from .responses import FastJSONResponse, rows_to_dicts
 from .schemas import (
-    ChannelActivityPoint,
     ChannelActivityResponse,
     MessageOut,
     TopProduct,
@@ -19,7 +20,12 @@ app = FastAPI(
     title="Medical Telegram Analytics API",
     description="REST endpoints backed by dbt marts for Week 8 challenge",
     version="0.1.0",
+    default_response_class=FastJSONResponse,
 )
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Handlers return query rows through FastJSONResponse directly; the response models only document the
+# contract, so SQL columns are cast to the types those models would have serialized.
 
 
 @app.get("/api/health")
@@ -28,7 +34,7 @@ def healthcheck() -> dict:
 
 
 @app.get("/api/reports/top-products", response_model=List[TopProduct])
-def top_products(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)) -> List[TopProduct]:
+def top_products(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)) -> FastJSONResponse:
     sql = text(
         """
         with tokens as (
@@ -47,14 +53,14 @@ def top_products(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_
         """
     )
     rows = db.execute(sql, {"limit": limit}).fetchall()
-    return [TopProduct(term=row.term, mentions=row.mentions) for row in rows]
+    return FastJSONResponse(rows_to_dicts(rows))
 
 
 @app.get("/api/channels/{channel_name}/activity", response_model=ChannelActivityResponse)
-def channel_activity(channel_name: str, db: Session = Depends(get_db)) -> ChannelActivityResponse:
+def channel_activity(channel_name: str, db: Session = Depends(get_db)) -> FastJSONResponse:
     summary_sql = text(
         """
-        select c.channel_name, count(*) as total_posts, avg(f.view_count) as avg_views
+        select c.channel_name, count(*) as total_posts, avg(f.view_count)::double precision as avg_views
         from marts.fct_messages f
         join marts.dim_channels c on f.channel_key = c.channel_key
         where c.channel_name ilike :channel
@@ -67,27 +73,18 @@ def channel_activity(channel_name: str, db: Session = Depends(get_db)) -> Channe
 
     trend_sql = text(
         """
-        select dd.full_date::date as dt, count(*) as posts, avg(f.view_count) as avg_views
+        select dd.full_date::date as date, count(*) as posts, avg(f.view_count)::double precision as avg_views
         from marts.fct_messages f
         join marts.dim_channels c on f.channel_key = c.channel_key
         join marts.dim_dates dd on f.date_key = dd.date_key
         where c.channel_name ilike :channel
         group by dd.full_date
-        order by dt desc
+        order by date desc
         limit 30
         """
     )
     trend_rows = db.execute(trend_sql, {"channel": channel_name}).fetchall()
-    trend = [
-        ChannelActivityPoint(date=row.dt, posts=row.posts, avg_views=row.avg_views)
-        for row in trend_rows
-    ]
-    return ChannelActivityResponse(
-        channel_name=summary.channel_name,
-        total_posts=summary.total_posts,
-        avg_views=summary.avg_views,
-        trend=trend,
-    )
+    return FastJSONResponse({**summary._mapping, "trend": rows_to_dicts(trend_rows)})
 
 
 @app.get("/api/search/messages", response_model=List[MessageOut])
@@ -95,7 +92,7 @@ def search_messages(
     query: str = Query(..., min_length=2),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
-) -> List[MessageOut]:
+) -> FastJSONResponse:
     sql = text(
         """
         select f.message_id, c.channel_name, f.message_text, dd.full_date as message_date, f.view_count
@@ -108,28 +105,19 @@ def search_messages(
         """
     )
     rows = db.execute(sql, {"query": f"%{query}%", "limit": limit}).fetchall()
-    return [
-        MessageOut(
-            message_id=row.message_id,
-            channel_name=row.channel_name,
-            message_text=row.message_text,
-            message_date=row.message_date,
-            view_count=row.view_count,
-        )
-        for row in rows
-    ]
+    return FastJSONResponse(rows_to_dicts(rows))
 
 
 @app.get("/api/reports/visual-content", response_model=List[VisualContentStat])
-def visual_content_stats(db: Session = Depends(get_db)) -> List[VisualContentStat]:
+def visual_content_stats(db: Session = Depends(get_db)) -> FastJSONResponse:
     sql = text(
         """
         select
             c.channel_name,
-            sum(case when fid.image_category = 'promotional' then f.view_count end) as promotional_views,
-            sum(case when fid.image_category = 'product_display' then f.view_count end) as product_display_views,
-            sum(case when fid.image_category = 'lifestyle' then f.view_count end) as lifestyle_views,
-            sum(case when fid.image_category = 'other' then f.view_count end) as other_views
+            sum(case when fid.image_category = 'promotional' then f.view_count end)::double precision as promotional_views,
+            sum(case when fid.image_category = 'product_display' then f.view_count end)::double precision as product_display_views,
+            sum(case when fid.image_category = 'lifestyle' then f.view_count end)::double precision as lifestyle_views,
+            sum(case when fid.image_category = 'other' then f.view_count end)::double precision as other_views
         from marts.fct_image_detections fid
         join marts.fct_messages f on fid.message_id = f.message_id
         join marts.dim_channels c on f.channel_key = c.channel_key
@@ -138,13 +126,4 @@ def visual_content_stats(db: Session = Depends(get_db)) -> List[VisualContentSta
         """
     )
     rows = db.execute(sql).fetchall()
-    return [
-        VisualContentStat(
-            channel_name=row.channel_name,
-            promotional_views=row.promotional_views,
-            product_display_views=row.product_display_views,
-            lifestyle_views=row.lifestyle_views,
-            other_views=row.other_views,
-        )
-        for row in rows
-    ]
+    return FastJSONResponse(rows_to_dicts(rows))
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+import orjson
+from fastapi.responses import Response
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson, for trusted query results that skip per-row model validation."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,10 @@
+select
+    cast(message_id as bigint) as message_id,
+    lower(trim(channel_name)) as channel_name,
+    product_name,
+    category as product_category,
+    matched_text,
+    char_offset,
+    cast(price_etb as numeric(12, 2)) as price_etb
+from {{ source('raw_layer', 'product_mentions') }}
+where message_id is not null
@@ -44,6 +44,21 @@ def load_raw_to_postgres() -> None:
     )
 
 
+@op
+def run_product_extraction() -> None:
+    _run(
+        [
+            "python",
+            "-m",
+            "src.product_extract",
+            "--lexicon",
+            "data/config/products.yml",
+            "--source",
+            "raw.telegram_messages",
+        ]
+    )
+
+
 @op
 def run_dbt_transformations() -> None:
     project_dir = PROJECT_ROOT / "medical_warehouse"
@@ -82,22 +97,39 @@ def run_yolo_enrichment() -> None:
     )
 
 
+@op
+def compact_raw_partitions() -> None:
+    _run(["python", "-m", "src.compaction", "--older-than-days", "60"])
+
+
 @job
 def medical_telegram_job() -> None:
     scrape_telegram_data()
     load_raw_to_postgres()
+    run_product_extraction()
     run_dbt_transformations()
     run_yolo_enrichment()
 
 
+@job
+def raw_compaction_job() -> None:
+    compact_raw_partitions()
+
+
 definitions = Definitions(
-    jobs=[medical_telegram_job],
+    jobs=[medical_telegram_job, raw_compaction_job],
     schedules=[
         ScheduleDefinition(
             job=medical_telegram_job,
             cron_schedule="0 4 * * *",
             execution_timezone="UTC",
             name="daily_medical_telegram",
-        )
+        ),
+        ScheduleDefinition(
+            job=raw_compaction_job,
+            cron_schedule="0 3 1 * *",
+            execution_timezone="UTC",
+            name="monthly_raw_compaction",
+        ),
     ],
 )
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import zstandard
+
+from .config import get_settings
+from .logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_DIR = "_segments"
+SEGMENT_SUFFIX = ".jsonl.zst"
+ARCHIVE_DIR = "_archive"
+
+
+def _day_partition(path: Path) -> Optional[date]:
+    try:
+        return datetime.strptime(path.name, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def partition_files(day_dir: Path) -> List[Path]:
+    """Batch ``*.json`` arrays and streamed ``*.jsonl`` files of one daily partition."""
+    files = [*day_dir.glob("*.json"), *day_dir.glob("*.jsonl")]
+    return sorted(file for file in files if not file.name.startswith("."))
+
+
+def read_partition_file(file: Path) -> List[Dict]:
+    content = file.read_text(encoding="utf-8")
+    if file.suffix == ".jsonl":
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    return json.loads(content)
+
+
+def segment_paths(root: Path) -> List[Path]:
+    segment_dir = root / SEGMENT_DIR
+    if not segment_dir.is_dir():
+        return []
+    return sorted(segment_dir.glob(f"*{SEGMENT_SUFFIX}"))
+
+
+def read_segment(path: Path) -> Iterator[Dict]:
+    with path.open("rb") as handle:
+        reader = zstandard.ZstdDecompressor().stream_reader(handle)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_segment(path: Path, records: Iterable[Dict], level: int = 10) -> int:
+    """Atomically (re)write ``path`` as zstd-compressed JSON lines; returns the number of records."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    count = 0
+    with tmp_path.open("wb") as handle:
+        with zstandard.ZstdCompressor(level=level).stream_writer(handle) as writer:
+            for record in records:
+                writer.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def compact_messages(root: Path, cutoff: date, level: int = 10) -> List[Path]:
+    """Merge daily ``<YYYY-MM-DD>/*.json[l]`` partitions older than ``cutoff`` into one segment per month.
+
+    Days that land in an already compacted month (late backfills) are merged into the existing segment.
+    """
+    months: Dict[str, List[Path]] = defaultdict(list)
+    for day_dir in sorted(root.iterdir()) if root.is_dir() else []:
+        day = _day_partition(day_dir)
+        if day is not None and day_dir.is_dir() and day < cutoff:
+            months[day.strftime("%Y-%m")].append(day_dir)
+
+    written: List[Path] = []
+    for month, day_dirs in sorted(months.items()):
+        segment = root / SEGMENT_DIR / f"{month}{SEGMENT_SUFFIX}"
+        files = [file for day_dir in day_dirs for file in partition_files(day_dir)]
+
+        def records() -> Iterator[Dict]:
+            if segment.exists():
+                yield from read_segment(segment)
+            for file in files:
+                yield from read_partition_file(file)
+
+        count = write_segment(segment, records(), level)
+        for file in files:
+            file.unlink()
+        for day_dir in day_dirs:
+            if not any(day_dir.iterdir()):
+                day_dir.rmdir()
+        logger.info(
+            "Compacted %s files from %s days into %s (%s records)", len(files), len(day_dirs), segment, count
+        )
+        written.append(segment)
+    return written
+
+
+def _rewrite_archive(archive: Path, images: List[Path]) -> List[Path]:
+    """Write ``archive`` plus ``images`` to a temp zip and swap it in; returns images now safe to delete.
+
+    An image whose name is already archived with different bytes (a newer re-download) is left loose.
+    """
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = archive.with_name(archive.name + ".tmp")
+    safe: List[Path] = []
+    # JPEGs are already compressed; storing them keeps member reads a single seek.
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as bundle:
+        present = set()
+        if archive.exists():
+            with zipfile.ZipFile(archive) as current:
+                for info in current.infolist():
+                    with current.open(info) as src, bundle.open(info.filename, "w") as dst:
+                        shutil.copyfileobj(src, dst)
+                    present.add(info.filename)
+                for image in images:
+                    if image.name in present and current.read(image.name) == image.read_bytes():
+                        safe.append(image)
+        for image in images:
+            if image.name not in present:
+                bundle.write(image, arcname=image.name)
+                safe.append(image)
+    os.replace(tmp_path, archive)
+    return safe
+
+
+def archive_images(image_root: Path, cutoff: date) -> List[Path]:
+    """Pack ``<channel>/<message_id>.jpg`` files last modified before ``cutoff`` into monthly zip archives."""
+    written = set()
+    for channel_dir in sorted(image_root.iterdir()) if image_root.is_dir() else []:
+        if not channel_dir.is_dir():
+            continue
+        months: Dict[str, List[Path]] = defaultdict(list)
+        for image in channel_dir.glob("*.jpg"):
+            modified = datetime.fromtimestamp(image.stat().st_mtime, tz=timezone.utc).date()
+            if modified < cutoff:
+                months[modified.strftime("%Y-%m")].append(image)
+        for month, images in sorted(months.items()):
+            archive = channel_dir / ARCHIVE_DIR / f"{month}.zip"
+            archived = _rewrite_archive(archive, images)
+            for image in archived:
+                image.unlink()
+            skipped = len(images) - len(archived)
+            if skipped:
+                logger.warning("Kept %s loose images in %s that differ from their archived copy", skipped, channel_dir)
+            logger.info("Archived %s images into %s", len(archived), archive)
+            written.add(archive)
+    _archive_index.cache_clear()
+    return sorted(written)
+
+
+@lru_cache(maxsize=256)
+def _archive_index(channel_dir: Path) -> Dict[str, Path]:
+    """Member name -> archive for every zip under ``channel_dir/_archive``, read from their central directories."""
+    index: Dict[str, Path] = {}
+    for archive in sorted((channel_dir / ARCHIVE_DIR).glob("*.zip")):
+        with zipfile.ZipFile(archive) as bundle:
+            for name in bundle.namelist():
+                index[name] = archive
+    return index
+
+
+def iter_image_paths(image_root: Path) -> Iterator[Path]:
+    """Yield loose images and archived ones, the latter under the path they had before archiving.
+
+    A loose copy kept beside a differing archived member (see ``_rewrite_archive``) is yielded once.
+    """
+    yield from image_root.rglob("*.jpg")
+    for archive_dir in sorted(image_root.glob(f"*/{ARCHIVE_DIR}")):
+        for name in sorted(_archive_index(archive_dir.parent)):
+            image_path = archive_dir.parent / name
+            if not image_path.exists():
+                yield image_path
+
+
+def read_image_bytes(image_path: Path) -> bytes:
+    if image_path.exists():
+        return image_path.read_bytes()
+    archive = _archive_index(image_path.parent).get(image_path.name)
+    if archive is None:
+        # The directory may have been archived after this process cached its index.
+        _archive_index.cache_clear()
+        archive = _archive_index(image_path.parent).get(image_path.name)
+    if archive is None:
+        raise FileNotFoundError(image_path)
+    with zipfile.ZipFile(archive) as bundle:
+        return bundle.read(image_path.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact old raw message partitions and archive old images")
+    parser.add_argument("--older-than-days", type=int, default=60, help="Only touch data older than this")
+    parser.add_argument("--json-root", type=str, help="Raw message partition root")
+    parser.add_argument("--image-root", type=str, help="Raw image root")
+    parser.add_argument("--skip-messages", action="store_true")
+    parser.add_argument("--skip-images", action="store_true")
+    parser.add_argument("--level", type=int, default=10, help="zstd compression level")
+    args = parser.parse_args()
+
+    configure_logging(Path("logs/compaction.log"))
+    settings = get_settings()
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=args.older_than_days)
+    if not args.skip_messages:
+        compact_messages(Path(args.json_root or settings.raw_json_root), cutoff, args.level)
+    if not args.skip_images:
+        archive_images(Path(args.image_root or settings.raw_image_root), cutoff)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,12 +20,22 @@ class Settings(BaseSettings):
 
     data_root: Path = Field(default=Path("data"), alias="DATA_ROOT")
     yolo_model_path: Path = Field(default=Path("weights/yolov8n.pt"), alias="YOLO_MODEL_PATH")
+    yolo_backend: str = Field(default="torch", alias="YOLO_BACKEND")
+    yolo_threads: int = Field(default=0, alias="YOLO_THREADS")
+
+    media_max_side: int = Field(default=640, alias="MEDIA_MAX_SIDE")
+    media_jpeg_quality: int = Field(default=85, alias="MEDIA_JPEG_QUALITY")
+    keep_original_media: bool = Field(default=False, alias="KEEP_ORIGINAL_MEDIA")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
+    @property
+    def telegram_session_dir(self) -> Path:
+        return self.data_root / "sessions"
+
     @property
     def telegram_session_path(self) -> Path:
-        return self.data_root / "sessions" / "telegram"
+        return self.telegram_session_dir / "telegram"
 
     @property
     def raw_json_root(self) -> Path:
@@ -35,6 +45,10 @@ class Settings(BaseSettings):
     def raw_image_root(self) -> Path:
         return self.data_root / "raw" / "images"
 
+    @property
+    def raw_original_root(self) -> Path:
+        return self.data_root / "raw" / "originals"
+
     @property
     def yolo_output_path(self) -> Path:
         return self.data_root / "yolo" / "detections.csv"
@@ -5,24 +5,43 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
 
+from .compaction import read_partition_file, read_segment, segment_paths
 from .config import get_settings
 from .db import get_engine
 from .logger import configure_logging
 
 logger = logging.getLogger(__name__)
 
+# Fields broken out into typed columns of the messages table; compact payloads leave them out.
+MESSAGE_COLUMNS = (
+    "message_id",
+    "channel_name",
+    "message_date",
+    "message_text",
+    "has_media",
+    "image_path",
+    "views",
+    "forwards",
+)
+# Loader bookkeeping that only makes sense on the machine that ran the load.
+LOCAL_FIELDS = ("raw_file",)
+
 
 def read_json_records(root: Path) -> Iterable[Dict]:
-    for file in root.rglob("*.json"):
+    for segment in segment_paths(root):
+        for record in read_segment(segment):
+            record["raw_file"] = str(segment)
+            yield record
+    for file in sorted([*root.rglob("*.json"), *root.rglob("*.jsonl")]):
         if file.name.startswith("."):
             continue
-        payload = json.loads(file.read_text(encoding="utf-8"))
-        for record in payload:
+        for record in read_partition_file(file):
             record["raw_file"] = str(file)
             yield record
 
@@ -64,49 +83,115 @@ def ensure_table(schema: str, table: str, kind: str) -> None:
         conn.execute(text(ddl))
 
 
-def load_json(schema: str, table: str, source: Path) -> None:
+def compact_payload(record: Dict) -> Optional[str]:
+    """JSON for the fields of ``record`` that have no typed column, or ``None`` when nothing is left."""
+    extras = {key: value for key, value in record.items() if key not in MESSAGE_COLUMNS and key not in LOCAL_FIELDS}
+    return json.dumps(extras, ensure_ascii=False) if extras else None
+
+
+def message_params(record: Dict, payload: str = "compact") -> Dict:
+    message_date = record.get("message_date")
+    if isinstance(message_date, str):
+        message_date = datetime.fromisoformat(message_date)
+    return {
+        "message_id": record.get("message_id"),
+        "channel_name": record.get("channel_name"),
+        "message_date": message_date,
+        "message_text": record.get("message_text"),
+        "has_media": record.get("has_media", False),
+        "image_path": record.get("image_path"),
+        "views": record.get("views", 0) or 0,
+        "forwards": record.get("forwards", 0) or 0,
+        "raw_payload": compact_payload(record) if payload == "compact" else json.dumps(record),
+    }
+
+
+def insert_messages(conn: Connection, schema: str, table: str, records: List[Dict], payload: str = "compact") -> None:
+    insert_sql = text(
+        f"""
+        insert into {schema}.{table} (
+            message_id, channel_name, message_date, message_text,
+            has_media, image_path, views, forwards, raw_payload
+        ) values (
+            :message_id, :channel_name, :message_date, :message_text,
+            :has_media, :image_path, :views, :forwards, :raw_payload
+        ) on conflict (message_id) do nothing
+    """
+    )
+    conn.execute(insert_sql, [message_params(record, payload) for record in records])
+
+
+def load_json(schema: str, table: str, source: Path, payload: str = "compact", lz4: bool = False) -> None:
     ensure_table(schema, table, "json")
+    if lz4:
+        set_payload_compression(schema, table)
     engine = get_engine()
     rows = list(read_json_records(source))
     if not rows:
         logger.warning("No JSON records found under %s", source)
         return
-    for row in rows:
-        row.setdefault("views", 0)
-        row.setdefault("forwards", 0)
     with engine.begin() as conn:
-        insert_sql = text(
-            f"""
-            insert into {schema}.{table} (
-                message_id, channel_name, message_date, message_text,
-                has_media, image_path, views, forwards, raw_payload
-            ) values (
-                :message_id, :channel_name, :message_date, :message_text,
-                :has_media, :image_path, :views, :forwards, :raw_payload
-            ) on conflict (message_id) do nothing
-        """
-        )
-        for record in rows:
-            message_date = record.get("message_date")
-            if isinstance(message_date, str):
-                message_date = datetime.fromisoformat(message_date)
-            conn.execute(
-                insert_sql,
-                {
-                    "message_id": record.get("message_id"),
-                    "channel_name": record.get("channel_name"),
-                    "message_date": message_date,
-                    "message_text": record.get("message_text"),
-                    "has_media": record.get("has_media", False),
-                    "image_path": record.get("image_path"),
-                    "views": record.get("views", 0),
-                    "forwards": record.get("forwards", 0),
-                    "raw_payload": json.dumps(record),
-                },
-            )
+        insert_messages(conn, schema, table, rows, payload)
     logger.info("Loaded %s rows into %s.%s", len(rows), schema, table)
 
 
+def set_payload_compression(schema: str, table: str) -> None:
+    """Switch ``raw_payload`` TOAST compression to LZ4 (PostgreSQL 14+ built with lz4)."""
+    with get_engine().begin() as conn:
+        conn.execute(text(f"alter table {schema}.{table} alter column raw_payload set compression lz4"))
+
+
+def table_size(schema: str, table: str) -> int:
+    with get_engine().connect() as conn:
+        sql = text("select pg_total_relation_size(:relation)")
+        return conn.execute(sql, {"relation": f"{schema}.{table}"}).scalar_one()
+
+
+def compact_existing(schema: str, table: str, lz4: bool = False) -> Tuple[int, int]:
+    """Strip column-duplicated keys from stored ``raw_payload`` values, then rewrite the table to reclaim space."""
+    before = table_size(schema, table)
+    if lz4:
+        set_payload_compression(schema, table)
+    keys = list(MESSAGE_COLUMNS + LOCAL_FIELDS)
+    with get_engine().begin() as conn:
+        updated = conn.execute(
+            text(
+                f"""
+                update {schema}.{table}
+                set raw_payload = nullif(raw_payload - cast(:keys as text[]), '{{}}'::jsonb)
+                where raw_payload ?| cast(:keys as text[])
+                """
+            ),
+            {"keys": keys},
+        ).rowcount
+    # VACUUM cannot run inside a transaction block.
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"vacuum full {schema}.{table}"))
+    after = table_size(schema, table)
+    logger.info(
+        "Compacted %s rows in %s.%s: %.1f MB -> %.1f MB",
+        updated,
+        schema,
+        table,
+        before / 1024**2,
+        after / 1024**2,
+    )
+    return before, after
+
+
+def insert_detections(conn: Connection, schema: str, table: str, rows: List[Dict]) -> None:
+    insert_sql = text(
+        f"""
+        insert into {schema}.{table} (
+            message_id, channel_name, image_path, label, confidence, image_category
+        ) values (
+            :message_id, :channel_name, :image_path, :label, :confidence, :image_category
+        ) on conflict (message_id, label, image_path) do nothing
+    """
+    )
+    conn.execute(insert_sql, rows)
+
+
 def load_csv(schema: str, table: str, csv_path: Path) -> None:
     ensure_table(schema, table, "csv")
     df = read_csv_records(csv_path)
@@ -115,16 +200,7 @@ def load_csv(schema: str, table: str, csv_path: Path) -> None:
         return
     engine = get_engine()
     with engine.begin() as conn:
-        insert_sql = text(
-            f"""
-            insert into {schema}.{table} (
-                message_id, channel_name, image_path, label, confidence, image_category
-            ) values (
-                :message_id, :channel_name, :image_path, :label, :confidence, :image_category
-            ) on conflict (message_id, label, image_path) do nothing
-        """
-        )
-        conn.execute(insert_sql, df.to_dict(orient="records"))
+        insert_detections(conn, schema, table, df.to_dict(orient="records"))
     logger.info("Loaded %s detection rows", len(df))
 
 
@@ -134,14 +210,28 @@ def main() -> None:
     parser.add_argument("--table", default="telegram_messages")
     parser.add_argument("--source", type=str, help="Path to data source (JSON dir or CSV)")
     parser.add_argument("--mode", choices=["json", "csv"], default="json")
+    parser.add_argument(
+        "--payload",
+        choices=["compact", "full"],
+        default="compact",
+        help="raw_payload contents: only fields without a typed column, or the whole record",
+    )
+    parser.add_argument("--lz4", action="store_true", help="Use LZ4 TOAST compression for raw_payload")
+    parser.add_argument(
+        "--compact-existing",
+        action="store_true",
+        help="Migrate stored raw_payload values to the compact form and report table size before/after",
+    )
     args = parser.parse_args()
 
     configure_logging(Path("logs/loader.log"))
     settings = get_settings()
     source = Path(args.source) if args.source else settings.raw_json_root
 
-    if args.mode == "json":
-        load_json(args.schema, args.table, source)
+    if args.compact_existing:
+        compact_existing(args.schema, args.table, args.lz4)
+    elif args.mode == "json":
+        load_json(args.schema, args.table, source, args.payload, args.lz4)
     else:
         load_csv(args.schema, args.table, source)
 
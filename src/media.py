@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import Any, Dict
+
+from PIL import Image, ImageOps
+
+DECODE_ERRORS = (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError)
+
+
+def media_mime_type(message: Any) -> str | None:
+    if getattr(message, "photo", None) is not None:
+        return "image/jpeg"
+    document = getattr(message, "document", None)
+    if document is not None:
+        return getattr(document, "mime_type", None)
+    return None
+
+
+def is_image_media(message: Any) -> bool:
+    mime_type = media_mime_type(message) or ""
+    return mime_type.startswith("image/")
+
+
+def normalize_image(data: bytes, dest: Path, max_side: int, quality: int = 85) -> Dict[str, int]:
+    """Decode ``data`` and write an RGB JPEG no larger than ``max_side`` on either edge to ``dest``."""
+    with Image.open(io.BytesIO(data)) as img:
+        # Lets the JPEG decoder skip straight to a reduced scale instead of decoding full resolution.
+        img.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        img.save(dest, format="JPEG", quality=quality)
+        width, height = img.size
+    return {"image_width": width, "image_height": height, "image_bytes": dest.stat().st_size}
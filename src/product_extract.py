@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import ahocorasick
+import yaml
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+from .db import get_engine
+from .logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+Message = Tuple[int, Optional[str], Optional[str]]
+
+CURRENCY = r"(?:etb|birr|br\.?|ብር)"
+AMOUNT = r"\d[\d,]*(?:\.\d+)?"
+PRICE_PATTERN = re.compile(
+    rf"(?<![\w.]){CURRENCY}\s*(?P<pre>{AMOUNT})|(?P<post>{AMOUNT})\s*{CURRENCY}(?!\w)",
+    re.IGNORECASE,
+)
+# Phone numbers and IDs next to a currency word are not prices, and would overflow numeric(12, 2).
+MAX_PRICE_ETB = 10_000_000
+MENTION_COLUMNS = (
+    "message_id",
+    "channel_name",
+    "product_name",
+    "category",
+    "matched_text",
+    "char_offset",
+    "price_etb",
+)
+
+_automaton: Optional[ahocorasick.Automaton] = None
+
+
+def load_lexicon(path: Path) -> Dict[str, Tuple[str, str]]:
+    """Map every lower-cased alias in the YAML lexicon to its ``(product_name, category)``."""
+    with path.open("r", encoding="utf-8") as handle:
+        payload = yaml.safe_load(handle)
+    lexicon: Dict[str, Tuple[str, str]] = {}
+    for product in payload.get("products", []):
+        name = product["name"].strip().lower()
+        category = product.get("category", "other")
+        for alias in [name, *product.get("aliases", [])]:
+            lexicon[str(alias).strip().lower()] = (name, category)
+    return lexicon
+
+
+def build_automaton(lexicon: Dict[str, Tuple[str, str]]) -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for alias, (name, category) in lexicon.items():
+        automaton.add_word(alias, (len(alias), name, category))
+    automaton.make_automaton()
+    return automaton
+
+
+def _on_boundary(text_value: str, start: int, end: int) -> bool:
+    before = text_value[start - 1] if start > 0 else " "
+    after = text_value[end + 1] if end + 1 < len(text_value) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def parse_prices(message_text: str) -> List[Tuple[int, float]]:
+    prices: List[Tuple[int, float]] = []
+    for match in PRICE_PATTERN.finditer(message_text):
+        amount = (match.group("pre") or match.group("post")).replace(",", "")
+        try:
+            value = float(amount)
+        except ValueError:
+            continue
+        if value <= MAX_PRICE_ETB:
+            prices.append((match.start(), value))
+    return prices
+
+
+def _lower_preserving_offsets(message_text: str) -> str:
+    """Lower-case ``message_text`` without changing its length, so match offsets index the original text."""
+    lowered = message_text.lower()
+    if len(lowered) == len(message_text):
+        return lowered
+    # Characters such as "İ" expand when lower-cased; keep those as-is.
+    return "".join(low if len(low) == 1 else char for char, low in ((char, char.lower()) for char in message_text))
+
+
+def extract_mentions(message_text: str, automaton: ahocorasick.Automaton) -> List[dict]:
+    """Return leftmost-longest product mentions, each paired with the price quoted after it."""
+    lowered = _lower_preserving_offsets(message_text)
+    candidates = [
+        (end - length + 1, end, name, category)
+        for end, (length, name, category) in automaton.iter(lowered)
+        if _on_boundary(lowered, end - length + 1, end)
+    ]
+    candidates.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+    chosen = []
+    last_end = -1
+    for candidate in candidates:
+        if candidate[0] > last_end:
+            chosen.append(candidate)
+            last_end = candidate[1]
+    if not chosen:
+        return []
+
+    prices = parse_prices(message_text)
+    mentions: List[dict] = []
+    for idx, (start, end, name, category) in enumerate(chosen):
+        next_start = chosen[idx + 1][0] if idx + 1 < len(chosen) else len(message_text)
+        price = next((value for pos, value in prices if end < pos < next_start), None)
+        if price is None and len(chosen) == 1 and prices:
+            price = prices[0][1]
+        mentions.append(
+            {
+                "product_name": name,
+                "category": category,
+                "matched_text": message_text[start : end + 1],
+                "char_offset": start,
+                "price_etb": price,
+            }
+        )
+    return mentions
+
+
+def _init_worker(lexicon_path: str) -> None:
+    global _automaton
+    _automaton = build_automaton(load_lexicon(Path(lexicon_path)))
+
+
+def extract_batch(batch: Sequence[Message]) -> List[dict]:
+    assert _automaton is not None, "worker not initialised"
+    rows: List[dict] = []
+    for message_id, channel_name, message_text in batch:
+        if not message_text:
+            continue
+        for mention in extract_mentions(message_text, _automaton):
+            mention["message_id"] = message_id
+            mention["channel_name"] = channel_name
+            rows.append(mention)
+    return rows
+
+
+def run_pool(
+    batches: Iterable[Sequence[Message]],
+    lexicon_path: Path,
+    workers: int,
+    on_rows: Callable[[List[dict]], None],
+) -> int:
+    """Fan ``batches`` out over a process pool, keeping at most ``2 * workers`` batches in flight."""
+    processed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(lexicon_path),)) as pool:
+        pending: List[Tuple[int, Future]] = []
+        for batch in batches:
+            pending.append((len(batch), pool.submit(extract_batch, batch)))
+            if len(pending) >= workers * 2:
+                size, future = pending.pop(0)
+                on_rows(future.result())
+                processed += size
+        for size, future in pending:
+            on_rows(future.result())
+            processed += size
+    return processed
+
+
+def ensure_table(schema: str, table: str) -> None:
+    ddl = f"""
+        create table if not exists {schema}.{table} (
+            message_id bigint not null,
+            channel_name text,
+            product_name text not null,
+            category text,
+            matched_text text,
+            char_offset integer not null,
+            price_etb numeric(12, 2),
+            ingested_at timestamptz default now(),
+            primary key (message_id, product_name, char_offset)
+        );
+    """
+    with get_engine().begin() as conn:
+        conn.execute(text(ddl))
+
+
+def read_message_batches(source: str, batch_size: int) -> Iterator[List[Message]]:
+    sql = text(f"select message_id, channel_name, message_text from {source} where message_text is not null")
+    with get_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(sql)
+        for partition in result.partitions(batch_size):
+            yield [tuple(row) for row in partition]
+
+
+def extract(source: str, schema: str, table: str, lexicon_path: Path, workers: int, batch_size: int) -> None:
+    """Rebuild ``schema.table`` via a staging table so readers never see it empty or half-loaded."""
+    staging = f"{table}__staging"
+    ensure_table(schema, table)
+    ensure_table(schema, staging)
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text(f"truncate table {schema}.{staging}"))
+    columns = ", ".join(MENTION_COLUMNS)
+    insert_sql = (
+        f"insert into {schema}.{staging} ({columns}) values %s "
+        "on conflict (message_id, product_name, char_offset) do nothing"
+    )
+    written = 0
+    write_seconds = 0.0
+
+    def write(rows: List[dict]) -> None:
+        nonlocal written, write_seconds
+        if not rows:
+            return
+        write_started = time.perf_counter()
+        # A text() executemany costs one round trip per row on psycopg2; execute_values sends multi-row VALUES.
+        with engine.begin() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                execute_values(
+                    cursor, insert_sql, [tuple(row[col] for col in MENTION_COLUMNS) for row in rows], page_size=5000
+                )
+            finally:
+                cursor.close()
+        write_seconds += time.perf_counter() - write_started
+        written += len(rows)
+
+    started = time.perf_counter()
+    processed = run_pool(read_message_batches(source, batch_size), lexicon_path, workers, write)
+    # Swap in one transaction; a crash before this point leaves the published table untouched.
+    with engine.begin() as conn:
+        conn.execute(text(f"delete from {schema}.{table}"))
+        conn.execute(text(f"insert into {schema}.{table} ({columns}) select {columns} from {schema}.{staging}"))
+        conn.execute(text(f"truncate table {schema}.{staging}"))
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Extracted %s mentions from %s messages in %.1fs (%.0f msg/s); staging writes took %.1fs (%.0f rows/s)",
+        written,
+        processed,
+        elapsed,
+        processed / elapsed if elapsed else 0.0,
+        write_seconds,
+        written / write_seconds if write_seconds else 0.0,
+    )
+
+
+def synthetic_messages(lexicon_path: Path, count: int, seed: int = 8) -> List[Message]:
+    rng = random.Random(seed)
+    aliases = list(load_lexicon(lexicon_path))
+    filler = "available now in addis delivery free call us original quality stock limited".split()
+    messages: List[Message] = []
+    for message_id in range(count):
+        words = rng.choices(filler, k=rng.randint(8, 40))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), f"{rng.choice(aliases).title()} {rng.randint(50, 5000)} ETB")
+        messages.append((message_id, "benchmark", " ".join(words)))
+    return messages
+
+
+def benchmark(lexicon_path: Path, count: int, workers: int, batch_size: int) -> float:
+    messages = synthetic_messages(lexicon_path, count)
+    batches = (messages[idx : idx + batch_size] for idx in range(0, len(messages), batch_size))
+    mentions = 0
+
+    def tally(rows: List[dict]) -> None:
+        nonlocal mentions
+        mentions += len(rows)
+
+    started = time.perf_counter()
+    run_pool(batches, lexicon_path, workers, tally)
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else float("inf")
+    logger.info(
+        "Benchmark: %s messages, %s mentions, %s workers in %.2fs (%.0f msg/s)",
+        count,
+        mentions,
+        workers,
+        elapsed,
+        rate,
+    )
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract product mentions and ETB prices from raw messages")
+    parser.add_argument("--lexicon", type=str, default="data/config/products.yml", help="Product lexicon YAML")
+    parser.add_argument("--source", default="raw.telegram_messages", help="Table holding message_text")
+    parser.add_argument("--schema", default="raw")
+    parser.add_argument("--table", default="product_mentions")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Messages per worker batch")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        default=0,
+        help="Measure throughput on N synthetic messages instead of touching the database",
+    )
+    args = parser.parse_args()
+
+    configure_logging(Path("logs/product_extract.log"))
+    workers = args.workers or os.cpu_count() or 1
+    lexicon_path = Path(args.lexicon)
+    if args.benchmark:
+        benchmark(lexicon_path, args.benchmark, workers, args.batch_size)
+        return
+    extract(args.source, args.schema, args.table, lexicon_path, workers, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,25 @@ import argparse
 import asyncio
 import json
 import logging
+import multiprocessing
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from queue import Empty
 from typing import Iterable, List
 
 import yaml
-from telethon import TelegramClient
+from telethon import TelegramClient, events
 from telethon.errors import FloodWaitError, RPCError
+from telethon.utils import get_peer_id
 
 from .config import get_settings
+from .db import get_engine
+from .load_to_postgres import ensure_table, insert_messages
 from .logger import configure_logging
+from .media import DECODE_ERRORS, is_image_media, media_mime_type, normalize_image
+from .streaming import MicroBatcher
 from .utils import partition_path
 
 logger = logging.getLogger(__name__)
@@ -26,14 +35,36 @@ def load_channels(path: Path) -> List[str]:
     return [ch.strip() for ch in channels if ch]
 
 
+def discover_sessions(session_dir: Path) -> List[Path]:
+    """Telethon session paths (without the ``.session`` suffix) found under ``session_dir``."""
+    return sorted(path.with_suffix("") for path in session_dir.glob("*.session"))
+
+
+def channel_slug(channel: str) -> str:
+    return channel if "http" not in channel else channel.split("/")[-1]
+
+
+def channel_image_dir(channel: str) -> Path:
+    image_dir = get_settings().raw_image_root / channel.replace("https://t.me/", "")
+    image_dir.mkdir(parents=True, exist_ok=True)
+    return image_dir
+
+
+def message_timestamp(message) -> datetime:
+    if message.date.tzinfo is None:
+        return message.date.replace(tzinfo=timezone.utc)
+    return message.date.astimezone(timezone.utc)
+
+
 class TelegramScraper:
-    def __init__(self, session_path: Path) -> None:
+    def __init__(self, session_path: Path, sequential_updates: bool = False) -> None:
         self.settings = get_settings()
         session_path.parent.mkdir(parents=True, exist_ok=True)
         self.client = TelegramClient(
             session_path,
             self.settings.telegram_api_id,
             self.settings.telegram_api_hash,
+            sequential_updates=sequential_updates,
         )
 
     async def __aenter__(self) -> "TelegramScraper":
@@ -46,47 +77,77 @@ class TelegramScraper:
     async def __aexit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
         await self.client.disconnect()
 
-    async def scrape_channel(self, channel: str, days: int, limit: int) -> Path | None:
+    async def store_image(self, message, image_dir: Path) -> dict:
+        """Download an image message and keep a bounded, detector-ready JPEG copy of it."""
+        data = await self.client.download_media(message, file=bytes)
+        if not data:
+            return {}
+        meta = {"original_bytes": len(data)}
+        if self.settings.keep_original_media:
+            ext = getattr(message.file, "ext", None) or ".bin"
+            original = self.settings.raw_original_root / image_dir.name / f"{message.id}{ext}"
+            original.parent.mkdir(parents=True, exist_ok=True)
+            original.write_bytes(data)
+            meta["original_path"] = str(original)
+        dest = image_dir / f"{message.id}.jpg"
+        try:
+            meta.update(
+                await asyncio.to_thread(
+                    normalize_image, data, dest, self.settings.media_max_side, self.settings.media_jpeg_quality
+                )
+            )
+        except DECODE_ERRORS as exc:
+            logger.warning("Could not decode media for message %s: %s", message.id, exc)
+            return meta
+        meta["image_path"] = str(dest)
+        return meta
+
+    async def build_record(self, message, channel: str, image_dir: Path) -> dict:
+        has_media = bool(message.media)
+        media = {}
+        if has_media and is_image_media(message):
+            media = await self.store_image(message, image_dir)
+        return {
+            "message_id": message.id,
+            "channel_name": channel_slug(channel),
+            "message_date": message_timestamp(message).isoformat(),
+            "message_text": message.message,
+            "has_media": has_media,
+            "media_type": media_mime_type(message),
+            "image_path": media.pop("image_path", None),
+            "views": getattr(message, "views", 0) or 0,
+            "forwards": getattr(message, "forwards", 0) or 0,
+            **media,
+        }
+
+    async def scrape_channel(
+        self, channel: str, days: int, limit: int, raise_on_flood: bool = False
+    ) -> Path | None:
         horizon = datetime.now(timezone.utc) - timedelta(days=days)
         logger.info("Scraping %s", channel)
         records: List[dict] = []
-        image_dir = get_settings().raw_image_root / channel.replace("https://t.me/", "")
-        image_dir.mkdir(parents=True, exist_ok=True)
+        image_dir = channel_image_dir(channel)
 
-        try:
-            async for message in self.client.iter_messages(channel, limit=limit):
-                if message.date.tzinfo is None:
-                    message_ts = message.date.replace(tzinfo=timezone.utc)
-                else:
-                    message_ts = message.date.astimezone(timezone.utc)
-                if message_ts < horizon:
-                    break
-
-                has_media = bool(message.media)
-                image_path = None
-                if has_media:
-                    dest = image_dir / f"{message.id}.jpg"
-                    await self.client.download_media(message, file=str(dest))
-                    image_path = str(dest)
-
-                records.append(
-                    {
-                        "message_id": message.id,
-                        "channel_name": channel if "http" not in channel else channel.split("/")[-1],
-                        "message_date": message_ts.isoformat(),
-                        "message_text": message.message,
-                        "has_media": has_media,
-                        "image_path": image_path,
-                        "views": getattr(message, "views", 0) or 0,
-                        "forwards": getattr(message, "forwards", 0) or 0,
-                    }
-                )
-        except FloodWaitError as exc:
-            logger.warning("Flood wait for %s seconds", exc.seconds)
-            await asyncio.sleep(exc.seconds)
-        except RPCError as exc:
-            logger.error("Failed to scrape %s: %s", channel, exc)
-            return None
+        offset_id = 0
+        while True:
+            try:
+                async for message in self.client.iter_messages(
+                    channel, limit=limit - len(records), offset_id=offset_id
+                ):
+                    if message_timestamp(message) < horizon:
+                        break
+                    records.append(await self.build_record(message, channel, image_dir))
+                    offset_id = message.id
+                break
+            except FloodWaitError as exc:
+                if raise_on_flood:
+                    raise
+                # Sit out the wait, then resume below the last message already collected.
+                logger.warning("Flood wait for %s seconds on %s; resuming after it", exc.seconds, channel)
+                await asyncio.sleep(exc.seconds)
+            except RPCError as exc:
+                logger.error("Failed to scrape %s: %s", channel, exc)
+                return None
 
         if not records:
             logger.info("No records for %s", channel)
@@ -99,6 +160,110 @@ class TelegramScraper:
         return output_path
 
 
+class StreamSink:
+    """Writes micro-batches to the raw JSON layer and, optionally, straight into the raw Postgres table."""
+
+    def __init__(self, schema: str, table: str, load_db: bool = True, max_retry: int = 10000) -> None:
+        self.schema = schema
+        self.table = table
+        self.load_db = load_db
+        self.max_retry = max_retry
+        self.retry: List[dict] = []
+        if load_db:
+            ensure_table(schema, table, "json")
+
+    def write_files(self, records: List[dict]) -> None:
+        """Append records to one ``<channel>-stream.jsonl`` per channel and message day."""
+        by_file = defaultdict(list)
+        for record in records:
+            message_ts = datetime.fromisoformat(record["message_date"])
+            output_path = partition_path(
+                get_settings().raw_json_root, message_ts, record["channel_name"], "-stream", ".jsonl"
+            )
+            by_file[output_path].append(record)
+        for output_path, rows in by_file.items():
+            with output_path.open("a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def load(self, records: List[dict]) -> None:
+        with get_engine().begin() as conn:
+            insert_messages(conn, self.schema, self.table, records)
+
+    async def __call__(self, records: List[dict]) -> None:
+        await asyncio.to_thread(self.write_files, records)
+        if not self.load_db:
+            logger.info("Streamed %s records to the raw layer", len(records))
+            return
+        pending = self.retry + records
+        try:
+            await asyncio.to_thread(self.load, pending)
+        except Exception as exc:  # noqa: BLE001
+            # The batch is already in the raw JSON layer, so the daily loader will still pick it up if
+            # Postgres stays down longer than the retry buffer covers.
+            self.retry = pending[-self.max_retry :]
+            logger.warning("Postgres load failed (%s); %s records queued for retry", exc, len(self.retry))
+            return
+        self.retry = []
+        logger.info("Streamed %s records to the raw layer and Postgres", len(pending))
+
+
+async def follow(scraper: TelegramScraper, channels: List[str], batcher: MicroBatcher) -> None:
+    """Subscribe to new messages on ``channels`` and feed them to ``batcher`` until cancelled."""
+    client = scraper.client
+    chat_channels = {}
+    for channel in channels:
+        entity = await client.get_entity(channel)
+        chat_channels[get_peer_id(entity)] = channel
+    image_dirs = {channel: channel_image_dir(channel) for channel in channels}
+
+    async def on_message(event) -> None:
+        channel = chat_channels.get(event.chat_id)
+        if channel is None:
+            return
+        await batcher.put(await scraper.build_record(event.message, channel, image_dirs[channel]))
+
+    client.add_event_handler(on_message, events.NewMessage(chats=list(chat_channels)))
+    logger.info("Following %s channels", len(chat_channels))
+    delay = 1.0
+    while True:
+        started = time.monotonic()
+        try:
+            # Raises once Telethon's own auto-reconnect gives up or update handling fails.
+            await client.run_until_disconnected()
+        except (ConnectionError, OSError, RPCError) as exc:
+            logger.warning("Lost connection to Telegram: %s", exc)
+        if time.monotonic() - started > 60:
+            delay = 1.0
+        while True:
+            logger.warning("Disconnected from Telegram; reconnecting in %.0fs", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+            try:
+                await client.connect()
+                # Replays updates missed while disconnected.
+                await client.catch_up()
+                break
+            except (ConnectionError, OSError, RPCError) as exc:
+                logger.warning("Reconnect failed: %s", exc)
+
+
+async def run_follow(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    configure_logging(Path("logs/scraper.log"))
+    channels = load_channels(Path(args.channels))
+    sink = StreamSink(args.schema, args.table, load_db=not args.no_db)
+    batcher = MicroBatcher(sink, args.batch_size, args.flush_seconds, args.max_pending)
+    # Sequential updates make Telethon await each handler, so a full batcher queue stalls update
+    # processing instead of piling up handler tasks that already hold downloaded media.
+    async with TelegramScraper(settings.telegram_session_path, sequential_updates=True) as scraper:
+        flusher = asyncio.create_task(batcher.run())
+        try:
+            await follow(scraper, channels, batcher)
+        finally:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+
+
 async def run(args: argparse.Namespace) -> None:
     settings = get_settings()
     configure_logging(Path("logs/scraper.log"))
@@ -109,13 +274,107 @@ async def run(args: argparse.Namespace) -> None:
         await asyncio.gather(*tasks)
 
 
+async def drain_channel_queue(
+    session_path: Path, queue, days: int, limit: int, max_attempts: int, concurrency: int
+) -> None:
+    """Scrape channels pulled from ``queue`` until it is empty.
+
+    A flood wait pauses the whole session and hands the channel back to the queue so another session can
+    take it; on its last attempt the session sleeps through the wait and resumes that channel itself.
+    """
+    loop = asyncio.get_running_loop()
+    resume_at = 0.0
+
+    async def consume(scraper: TelegramScraper) -> None:
+        nonlocal resume_at
+        while True:
+            if resume_at > loop.time():
+                await asyncio.sleep(resume_at - loop.time())
+            try:
+                channel, attempts = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                await scraper.scrape_channel(channel, days, limit, raise_on_flood=attempts + 1 < max_attempts)
+            except FloodWaitError as exc:
+                logger.warning(
+                    "Session %s hit a %ss flood wait; re-queueing %s", session_path.name, exc.seconds, channel
+                )
+                queue.put((channel, attempts + 1))
+                resume_at = max(resume_at, loop.time() + exc.seconds)
+
+    async with TelegramScraper(session_path) as scraper:
+        await asyncio.gather(*(consume(scraper) for _ in range(concurrency)))
+
+
+def _session_worker(session_path: Path, queue, days: int, limit: int, max_attempts: int, concurrency: int) -> None:
+    configure_logging(Path("logs/scraper.log"))
+    asyncio.run(drain_channel_queue(session_path, queue, days, limit, max_attempts, concurrency))
+
+
+def run_session_pool(args: argparse.Namespace) -> None:
+    """Spread channels over one worker process per Telegram session, assigning them dynamically."""
+    configure_logging(Path("logs/scraper.log"))
+    channels = load_channels(Path(args.channels))
+    sessions = discover_sessions(get_settings().telegram_session_dir)[: args.sessions]
+    if len(sessions) < args.sessions:
+        raise RuntimeError(
+            f"Requested {args.sessions} sessions but only {len(sessions)} are authorized under "
+            f"{get_settings().telegram_session_dir}"
+        )
+    with multiprocessing.Manager() as manager:
+        queue = manager.Queue()
+        for channel in channels:
+            queue.put((channel, 0))
+        workers = [
+            multiprocessing.Process(
+                target=_session_worker,
+                args=(session, queue, args.days, args.limit, len(sessions), args.per_session),
+                name=f"scraper-{session.name}",
+            )
+            for session in sessions
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    failed = [worker.name for worker in workers if worker.exitcode]
+    if failed:
+        logger.error("Scraper workers exited with errors: %s", ", ".join(failed))
+        raise SystemExit(1)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Scrape Telegram medical commerce channels")
     parser.add_argument("--channels", type=str, required=True, help="Path to YAML file with channels list")
     parser.add_argument("--days", type=int, default=3, help="Lookback window in days")
     parser.add_argument("--limit", type=int, default=500, help="Message limit per channel")
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=1,
+        help="Number of Telegram sessions under the sessions directory to spread channels across",
+    )
+    parser.add_argument("--per-session", type=int, default=2, help="Concurrent channels per session worker")
+    parser.add_argument("--follow", action="store_true", help="Stream new messages instead of polling history")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per streamed micro-batch")
+    parser.add_argument("--flush-seconds", type=float, default=5.0, help="Max age of a streamed micro-batch")
+    parser.add_argument("--max-pending", type=int, default=1000, help="Queued records before handlers block")
+    parser.add_argument("--schema", default="raw")
+    parser.add_argument("--table", default="telegram_messages")
+    parser.add_argument("--no-db", action="store_true", help="Only write streamed batches to the raw JSON layer")
     return parser.parse_args()
 
 
+def main() -> None:
+    args = parse_args()
+    if args.follow:
+        asyncio.run(run_follow(args))
+    elif args.sessions > 1:
+        run_session_pool(args)
+    else:
+        asyncio.run(run(args))
+
+
 if __name__ == "__main__":
-    asyncio.run(run(parse_args()))
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[List[dict]], Awaitable[None]]
+
+
+class MicroBatcher:
+    """Collects records from a bounded queue and hands them to ``sink`` by size or age.
+
+    ``put`` blocks once ``max_pending`` records are waiting, which pushes back on the producer instead of
+    buffering without limit while the sink is slow.
+    """
+
+    def __init__(self, sink: Sink, batch_size: int = 100, flush_seconds: float = 5.0, max_pending: int = 1000) -> None:
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.batch: List[dict] = []
+
+    async def put(self, record: dict) -> None:
+        await self.queue.put(record)
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        try:
+            await self.sink(batch)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to flush %s records", len(batch))
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline: Optional[float] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    record = None
+                if record is not None:
+                    self.batch.append(record)
+                    if deadline is None:
+                        deadline = loop.time() + self.flush_seconds
+                if self.batch and (len(self.batch) >= self.batch_size or loop.time() >= (deadline or 0.0)):
+                    await self.flush()
+                    deadline = None
+        finally:
+            while not self.queue.empty():
+                self.batch.append(self.queue.get_nowait())
+            await self.flush()
@@ -6,10 +6,10 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
 
-def partition_path(root: Path, dt: datetime, channel: str) -> Path:
+def partition_path(root: Path, dt: datetime, channel: str, suffix: str = "", extension: str = ".json") -> Path:
     partition = root / dt.strftime("%Y-%m-%d")
     partition.mkdir(parents=True, exist_ok=True)
-    filename = f"{channel.lower().replace(' ', '_')}.json"
+    filename = f"{channel.lower().replace(' ', '_')}{suffix}{extension}"
     return partition / filename
 
 
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+Detection = Tuple[str, float]
+
+_ort_threads = 0
+_ort_threads_patched = False
+
+
+def onnx_cache_path(model_path: Path, backend: str) -> Path:
+    if backend == "onnx-int8":
+        return model_path.with_name(f"{model_path.stem}-int8.onnx")
+    return model_path.with_suffix(".onnx")
+
+
+def _is_fresh(target: Path, source: Path) -> bool:
+    return target.exists() and target.stat().st_mtime >= source.stat().st_mtime
+
+
+def export_onnx(model_path: Path, imgsz: int) -> Path:
+    target = onnx_cache_path(model_path, "onnx")
+    if _is_fresh(target, model_path):
+        return target
+    logger.info("Exporting %s to ONNX", model_path)
+    exported = Path(YOLO(str(model_path)).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=False))
+    if exported.resolve() != target.resolve():
+        shutil.move(str(exported), target)
+    return target
+
+
+def quantize_int8(onnx_path: Path) -> Path:
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    target = onnx_cache_path(onnx_path, "onnx-int8")
+    if _is_fresh(target, onnx_path):
+        return target
+    logger.info("Quantizing %s to int8", onnx_path)
+    quantize_dynamic(str(onnx_path), str(target), weight_type=QuantType.QUInt8)
+    # Ultralytics reads class names and stride from the ONNX metadata, keep it on the quantized copy.
+    source_meta = {prop.key: prop.value for prop in onnx.load(str(onnx_path)).metadata_props}
+    quantized = onnx.load(str(target))
+    present = {prop.key for prop in quantized.metadata_props}
+    for key, value in source_meta.items():
+        if key not in present:
+            entry = quantized.metadata_props.add()
+            entry.key, entry.value = key, value
+    onnx.save(quantized, str(target))
+    return target
+
+
+def resolve_weights(model_path: Path, backend: str, imgsz: int = 640) -> Path:
+    """Return the weights file for ``backend``, exporting and caching it next to the .pt if needed."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == "torch":
+        return model_path
+    if model_path.suffix == ".onnx":
+        return quantize_int8(model_path) if backend == "onnx-int8" else model_path
+    onnx_path = export_onnx(model_path, imgsz)
+    if backend == "onnx-int8":
+        return quantize_int8(onnx_path)
+    return onnx_path
+
+
+def configure_threads(threads: int) -> None:
+    """Pin torch and ONNX Runtime intra-op threads; ``0`` keeps the library defaults."""
+    global _ort_threads, _ort_threads_patched
+    _ort_threads = max(threads, 0)
+    if threads > 0:
+        torch.set_num_threads(threads)
+    try:
+        import onnxruntime
+    except ImportError:
+        return
+    if _ort_threads_patched:
+        return
+    # Ultralytics builds the InferenceSession without SessionOptions, so inject them here. The thread count
+    # is read at session creation so later calls to configure_threads take effect.
+    _orig_session = onnxruntime.InferenceSession
+
+    def _session(path_or_bytes, sess_options=None, *args, **kwargs):
+        if sess_options is None and _ort_threads > 0:
+            sess_options = onnxruntime.SessionOptions()
+            sess_options.intra_op_num_threads = _ort_threads
+            sess_options.inter_op_num_threads = 1
+        return _orig_session(path_or_bytes, sess_options, *args, **kwargs)
+
+    onnxruntime.InferenceSession = _session
+    _ort_threads_patched = True
+
+
+def load_model(model_path: Path, backend: str = "torch", threads: int = 0, imgsz: int = 640) -> YOLO:
+    configure_threads(threads)
+    weights = resolve_weights(model_path, backend, imgsz)
+    logger.info("Loading %s backend from %s", backend, weights)
+    return YOLO(str(weights), task="detect")
+
+
+def predict(model: YOLO, source, conf: float, imgsz: int = 640) -> List[Detection]:
+    detections: List[Detection] = []
+    for result in model.predict(source=source, conf=conf, imgsz=imgsz, verbose=False):
+        names = result.names
+        for box in result.boxes:
+            detections.append((names[int(box.cls.item())], float(box.conf.item())))
+    return detections
+
+
+def detections_match(baseline: Sequence[Detection], candidate: Sequence[Detection], tolerance: float) -> bool:
+    """True when both runs found the same labels with per-label confidences within ``tolerance``."""
+    grouped: Dict[str, List[List[float]]] = defaultdict(lambda: [[], []])
+    for label, score in baseline:
+        grouped[label][0].append(score)
+    for label, score in candidate:
+        grouped[label][1].append(score)
+    for expected, actual in grouped.values():
+        if len(expected) != len(actual):
+            return False
+        for left, right in zip(sorted(expected), sorted(actual)):
+            if abs(left - right) > tolerance:
+                return False
+    return True
+
+
+def compare_backends(
+    images: Sequence[Union[str, np.ndarray]],
+    model_path: Path,
+    backends: Sequence[str],
+    conf: float,
+    threads: int = 0,
+    tolerance: float = 0.05,
+    imgsz: int = 640,
+) -> List[dict]:
+    """Benchmark each backend against the torch baseline on ``images`` (file paths or decoded BGR arrays)."""
+    if not images:
+        return []
+    report: List[dict] = []
+    baseline: List[List[Detection]] = []
+    for backend in ("torch", *[b for b in backends if b != "torch"]):
+        model = load_model(model_path, backend, threads, imgsz)
+        predict(model, images[0], conf, imgsz)  # warm-up
+        outputs: List[List[Detection]] = []
+        started = time.perf_counter()
+        for image in images:
+            outputs.append(predict(model, image, conf, imgsz))
+        elapsed = time.perf_counter() - started
+        if backend == "torch":
+            baseline = outputs
+        matches = sum(detections_match(b, o, tolerance) for b, o in zip(baseline, outputs))
+        report.append(
+            {
+                "backend": backend,
+                "images": len(images),
+                "images_per_sec": len(images) / elapsed if elapsed else float("inf"),
+                "agreement": matches / len(images),
+            }
+        )
+    return report
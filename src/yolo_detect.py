@@ -5,10 +5,12 @@ import inspect
 import logging
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Union
 
 os.environ.setdefault("TORCH_LOAD_WEIGHTS_ONLY", "0")
 
+import cv2
+import numpy as np
 import pandas as pd
 import torch
 from torch.nn.modules.container import Sequential
@@ -16,8 +18,11 @@ from torch.serialization import add_safe_globals
 from ultralytics import YOLO
 from ultralytics.nn.tasks import DetectionModel
 
+from .compaction import iter_image_paths, read_image_bytes
 from .config import get_settings
 from .logger import configure_logging
+from .yolo_backends import BACKENDS, compare_backends, load_model, predict
+from .yolo_queue import default_worker_id, enqueue_images, run_worker
 
 logger = logging.getLogger(__name__)
 
@@ -48,50 +53,57 @@ def derive_category(labels: List[str]) -> str:
     return "other"
 
 
-def detect(image_root: Path, output_path: Path, model_path: Path, conf: float) -> None:
-    model = YOLO(str(model_path))
+def image_source(image_path: Path) -> Union[str, np.ndarray]:
+    """Prediction source for ``image_path``: the file path, or the decoded pixels of an archived image."""
+    if image_path.exists():
+        return str(image_path)
+    # Archived image: decode straight from the zip member instead of extracting it.
+    source = cv2.imdecode(np.frombuffer(read_image_bytes(image_path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if source is None:
+        # YOLO falls back to its bundled sample images when given None.
+        raise ValueError(f"Could not decode archived image {image_path}")
+    return source
+
+
+def detect_image(model: YOLO, image_path: Path, conf: float) -> List[dict]:
+    """Run one image through ``model`` and return its detection rows (a ``none`` row when empty)."""
+    message_id = int(image_path.stem)
+    channel_name = image_path.parent.name
+    detections = predict(model, image_source(image_path), conf)
+    category = derive_category([label for label, _ in detections])
+    if not detections:
+        detections = [("none", 0.0)]
+    return [
+        {
+            "message_id": message_id,
+            "channel_name": channel_name,
+            "image_path": str(image_path),
+            "label": label,
+            "confidence": score,
+            "image_category": category,
+        }
+        for label, score in detections
+    ]
+
+
+def detect(
+    image_root: Path,
+    output_path: Path,
+    model_path: Path,
+    conf: float,
+    backend: str = "torch",
+    threads: int = 0,
+) -> None:
+    model = load_model(model_path, backend, threads)
     rows: List[dict] = []
-    for image_path in image_root.rglob("*.jpg"):
-        try:
-            message_id = int(image_path.stem)
-        except ValueError:
+    for image_path in iter_image_paths(image_root):
+        if not image_path.stem.isdigit():
             logger.warning("Skipping %s because filename is not numeric", image_path)
             continue
-        channel_name = image_path.parent.name
-        results = model.predict(source=str(image_path), conf=conf, verbose=False)
-        labels: List[str] = []
-        for result in results:
-            names = result.names
-            for box in result.boxes:
-                label_idx = int(box.cls.item())
-                label = names[label_idx]
-                labels.append(label)
-                rows.append(
-                    {
-                        "message_id": message_id,
-                        "channel_name": channel_name,
-                        "image_path": str(image_path),
-                        "label": label,
-                        "confidence": float(box.conf.item()),
-                        "image_category": None,  # placeholder
-                    }
-                )
-        if not labels:
-            rows.append(
-                {
-                    "message_id": message_id,
-                    "channel_name": channel_name,
-                    "image_path": str(image_path),
-                    "label": "none",
-                    "confidence": 0.0,
-                    "image_category": derive_category(labels),
-                }
-            )
-        else:
-            category = derive_category(labels)
-            for row in rows:
-                if row["message_id"] == message_id and row["image_category"] is None:
-                    row["image_category"] = category
+        try:
+            rows.extend(detect_image(model, image_path, conf))
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping %s: %s", image_path, exc)
     if not rows:
         logger.warning("No detections generated")
         return
@@ -101,21 +113,87 @@ def detect(image_root: Path, output_path: Path, model_path: Path, conf: float) -
     logger.info("Saved %s detections to %s", len(df), output_path)
 
 
+def run_comparison(image_root: Path, model_path: Path, conf: float, threads: int, sample: int, tolerance: float) -> None:
+    sources = []
+    for image_path in sorted(iter_image_paths(image_root))[:sample]:
+        try:
+            sources.append(image_source(image_path))
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping %s: %s", image_path, exc)
+    if not sources:
+        logger.warning("No images under %s to compare backends on", image_root)
+        return
+    for entry in compare_backends(sources, model_path, BACKENDS, conf, threads, tolerance):
+        logger.info(
+            "%-10s %6.2f img/s  agreement %.1f%% over %s images",
+            entry["backend"],
+            entry["images_per_sec"],
+            entry["agreement"] * 100,
+            entry["images"],
+        )
+        if entry["agreement"] < 1.0:
+            logger.warning("%s disagrees with torch on some images (tolerance %.3f)", entry["backend"], tolerance)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run YOLO detections on scraped images")
     parser.add_argument("--image-root", type=str, help="Root folder with channel subdirectories")
     parser.add_argument("--output", type=str, help="CSV output path")
     parser.add_argument("--model", type=str, help="Path to YOLOv8 model weights", default=None)
     parser.add_argument("--conf", type=float, default=0.35, help="Confidence threshold")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="Inference backend")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for inference (0 = library default)")
+    parser.add_argument(
+        "--compare",
+        type=int,
+        metavar="N",
+        default=0,
+        help="Benchmark every backend against torch on N images instead of writing detections",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Confidence tolerance for --compare")
+    parser.add_argument("--enqueue", action="store_true", help="Queue images under --image-root for workers")
+    parser.add_argument("--worker", action="store_true", help="Claim queued images and write detections to Postgres")
+    parser.add_argument("--schema", default="raw")
+    parser.add_argument("--queue-table", default="yolo_jobs")
+    parser.add_argument("--detections-table", default="image_detections")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images claimed per worker batch")
+    parser.add_argument("--lease-seconds", type=int, default=300, help="Lease length renewed by the heartbeat")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts before a job is marked failed")
+    parser.add_argument(
+        "--poll-seconds", type=float, default=0.0, help="Keep polling an empty queue (0 exits when drained)"
+    )
     args = parser.parse_args()
 
     settings = get_settings()
     image_root = Path(args.image_root or settings.raw_image_root)
     output_path = Path(args.output or settings.yolo_output_path)
     model_path = Path(args.model or settings.yolo_model_path)
+    backend = args.backend or settings.yolo_backend
+    threads = settings.yolo_threads if args.threads is None else args.threads
 
     configure_logging(Path("logs/yolo.log"))
-    detect(image_root, output_path, model_path, args.conf)
+    if args.compare:
+        run_comparison(image_root, model_path, args.conf, threads, args.compare, args.tolerance)
+        return
+    if args.enqueue:
+        enqueue_images(image_root, args.schema, args.queue_table)
+        return
+    if args.worker:
+        model = load_model(model_path, backend, threads)
+        run_worker(
+            lambda image_path: detect_image(model, image_path, args.conf),
+            args.schema,
+            args.queue_table,
+            args.detections_table,
+            default_worker_id(),
+            image_root,
+            batch_size=args.batch_size,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts,
+            poll_seconds=args.poll_seconds,
+        )
+        return
+    detect(image_root, output_path, model_path, args.conf, backend, threads)
 
 
 if __name__ == "__main__":
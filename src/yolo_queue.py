@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .compaction import iter_image_paths
+from .db import get_engine
+from .load_to_postgres import ensure_table, insert_detections
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def ensure_job_table(schema: str, table: str, engine: Optional[Engine] = None) -> None:
+    ddl = f"""
+        create table if not exists {schema}.{table} (
+            image_path text primary key,
+            status text not null default 'pending',
+            attempts integer not null default 0,
+            worker_id text,
+            leased_until timestamptz,
+            last_error text,
+            enqueued_at timestamptz default now(),
+            updated_at timestamptz default now()
+        );
+        create index if not exists {table}_status_idx on {schema}.{table} (status, enqueued_at);
+    """
+    with (engine or get_engine()).begin() as conn:
+        conn.execute(text(ddl))
+
+
+def enqueue_images(image_root: Path, schema: str, table: str, chunk_size: int = 5000) -> int:
+    """Queue every numeric ``<message_id>.jpg`` under ``image_root``; already-known images are left alone.
+
+    Paths are stored relative to ``image_root`` so workers on other nodes can resolve them against their
+    own mount of the image store.
+    """
+    engine = get_engine()
+    ensure_job_table(schema, table, engine)
+    insert_sql = text(
+        f"insert into {schema}.{table} (image_path) values (:image_path) on conflict (image_path) do nothing"
+    )
+    queued = 0
+    chunk: List[Dict] = []
+    for image_path in iter_image_paths(image_root):
+        if not image_path.stem.isdigit():
+            continue
+        chunk.append({"image_path": image_path.relative_to(image_root).as_posix()})
+        if len(chunk) >= chunk_size:
+            with engine.begin() as conn:
+                conn.execute(insert_sql, chunk)
+            queued += len(chunk)
+            chunk = []
+    if chunk:
+        with engine.begin() as conn:
+            conn.execute(insert_sql, chunk)
+        queued += len(chunk)
+    logger.info("Offered %s images to %s.%s", queued, schema, table)
+    return queued
+
+
+def requeue_expired(engine: Engine, schema: str, table: str, max_attempts: int) -> int:
+    """Release jobs whose worker stopped heartbeating; jobs out of attempts are marked failed."""
+    sql = text(
+        f"""
+        update {schema}.{table}
+        set status = case when attempts >= :max_attempts then 'failed' else 'pending' end,
+            worker_id = null,
+            leased_until = null,
+            updated_at = now()
+        where status = 'running' and leased_until < now()
+        """
+    )
+    with engine.begin() as conn:
+        return conn.execute(sql, {"max_attempts": max_attempts}).rowcount
+
+
+def claim_batch(
+    engine: Engine, schema: str, table: str, worker_id: str, batch_size: int, lease_seconds: int
+) -> List[Tuple[str, int]]:
+    """Lease up to ``batch_size`` pending jobs; returns ``(image_path, attempts)`` pairs."""
+    sql = text(
+        f"""
+        with claimed as (
+            select image_path
+            from {schema}.{table}
+            where status = 'pending'
+            order by enqueued_at
+            limit :batch_size
+            for update skip locked
+        )
+        update {schema}.{table} j
+        set status = 'running',
+            worker_id = :worker_id,
+            attempts = j.attempts + 1,
+            leased_until = now() + make_interval(secs => :lease_seconds),
+            updated_at = now()
+        from claimed
+        where j.image_path = claimed.image_path
+        returning j.image_path, j.attempts
+        """
+    )
+    params = {"batch_size": batch_size, "worker_id": worker_id, "lease_seconds": lease_seconds}
+    with engine.begin() as conn:
+        return [(row.image_path, row.attempts) for row in conn.execute(sql, params)]
+
+
+class Heartbeat(threading.Thread):
+    """Keeps extending the leases held by ``worker_id`` while a batch is being processed."""
+
+    def __init__(self, engine: Engine, schema: str, table: str, worker_id: str, lease_seconds: int) -> None:
+        super().__init__(name=f"heartbeat-{worker_id}", daemon=True)
+        self.engine = engine
+        self.sql = text(
+            f"""
+            update {schema}.{table}
+            set leased_until = now() + make_interval(secs => :lease_seconds), updated_at = now()
+            where worker_id = :worker_id and status = 'running'
+            """
+        )
+        self.params = {"worker_id": worker_id, "lease_seconds": lease_seconds}
+        self.interval = max(1.0, lease_seconds / 3)
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self.sql, self.params)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Heartbeat failed: %s", exc)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def run_worker(
+    process: Callable[[Path], List[dict]],
+    schema: str,
+    table: str,
+    detections_table: str,
+    worker_id: str,
+    image_root: Path,
+    batch_size: int = 32,
+    lease_seconds: int = 300,
+    max_attempts: int = 3,
+    poll_seconds: float = 0.0,
+) -> int:
+    """Claim and process batches until the queue is drained.
+
+    Detections and job completion are committed in one transaction per batch, so a crash only ever loses
+    leases, which ``requeue_expired`` hands back to the queue. ``poll_seconds > 0`` keeps polling instead
+    of exiting when the queue is empty. Job paths are resolved against this worker's ``image_root`` and
+    detections are stored under the relative job path.
+    """
+    engine = get_engine()
+    ensure_job_table(schema, table, engine)
+    ensure_table(schema, detections_table, "csv")
+    done_sql = text(
+        f"""
+        update {schema}.{table}
+        set status = 'done', worker_id = null, leased_until = null, last_error = null, updated_at = now()
+        where image_path = :image_path and worker_id = :worker_id
+        """
+    )
+    failed_sql = text(
+        f"""
+        update {schema}.{table}
+        set status = :status, worker_id = null, leased_until = null, last_error = :error, updated_at = now()
+        where image_path = :image_path and worker_id = :worker_id
+        """
+    )
+    processed = 0
+    heartbeat = Heartbeat(engine, schema, table, worker_id, lease_seconds)
+    heartbeat.start()
+    try:
+        while True:
+            requeue_expired(engine, schema, table, max_attempts)
+            claimed = claim_batch(engine, schema, table, worker_id, batch_size, lease_seconds)
+            if not claimed:
+                if poll_seconds <= 0:
+                    break
+                time.sleep(poll_seconds)
+                continue
+            rows: List[dict] = []
+            done: List[Dict] = []
+            failed: List[Dict] = []
+            for image_path, attempts in claimed:
+                try:
+                    detections = process(image_root / image_path)
+                    # Store the root-relative job path so the (message_id, label, image_path) key does not depend
+                    # on which node's mount processed the image.
+                    rows.extend({**row, "image_path": image_path} for row in detections)
+                    done.append({"image_path": image_path, "worker_id": worker_id})
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Detection failed for %s: %s", image_path, exc)
+                    failed.append(
+                        {
+                            "image_path": image_path,
+                            "worker_id": worker_id,
+                            "error": str(exc)[:500],
+                            "status": "failed" if attempts >= max_attempts else "pending",
+                        }
+                    )
+            with engine.begin() as conn:
+                if rows:
+                    insert_detections(conn, schema, detections_table, rows)
+                if done:
+                    conn.execute(done_sql, done)
+                if failed:
+                    conn.execute(failed_sql, failed)
+            processed += len(done)
+            logger.info("Worker %s finished %s images (%s failed)", worker_id, len(done), len(failed))
+    finally:
+        heartbeat.stop()
+    logger.info("Worker %s processed %s images", worker_id, processed)
+    return processed
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.compression import CompressionMiddleware, negotiate_encoding
+from api.responses import FastJSONResponse
+
+
+def _client() -> TestClient:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big() -> FastJSONResponse:
+        return FastJSONResponse([{"term": "paracetamol", "mentions": idx} for idx in range(50)])
+
+    @app.get("/small")
+    def small() -> FastJSONResponse:
+        return FastJSONResponse({"avg_views": Decimal("12.5"), "at": datetime(2026, 1, 14, tzinfo=timezone.utc)})
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding_prefers_brotli() -> None:
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("identity") is None
+
+
+def test_large_payloads_are_compressed() -> None:
+    client = _client()
+    raw = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    for encoding in ("br", "gzip"):
+        response = client.get("/big", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(raw.content)
+        assert response.json() == raw.json()
+
+
+def test_small_payload_matches_pydantic_encoding() -> None:
+    response = _client().get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b'{"avg_views":12.5,"at":"2026-01-14T00:00:00Z"}'
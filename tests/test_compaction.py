@@ -0,0 +1,70 @@
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from src.compaction import archive_images, compact_messages, iter_image_paths, read_image_bytes
+from src.load_to_postgres import read_json_records
+from src.utils import partition_path
+
+
+def _write_day(root: Path, day: datetime, channel: str, ids: list) -> None:
+    path = partition_path(root, day, channel)
+    path.write_text(json.dumps([{"message_id": idx, "channel_name": channel} for idx in ids]), encoding="utf-8")
+
+
+def test_compact_messages_merges_old_days_into_monthly_segments(tmp_path: Path) -> None:
+    _write_day(tmp_path, datetime(2025, 11, 3), "CheMed", [1, 2])
+    _write_day(tmp_path, datetime(2025, 11, 20), "tikvahpharma", [3])
+    _write_day(tmp_path, datetime(2026, 1, 14), "CheMed", [4])
+    segments = compact_messages(tmp_path, cutoff=date(2026, 1, 1))
+    assert [segment.name for segment in segments] == ["2025-11.jsonl.zst"]
+    assert not (tmp_path / "2025-11-03").exists()
+
+    _write_day(tmp_path, datetime(2025, 11, 28), "CheMed", [5])
+    compact_messages(tmp_path, cutoff=date(2026, 1, 1))
+    assert sorted(record["message_id"] for record in read_json_records(tmp_path)) == [1, 2, 3, 4, 5]
+
+
+def test_archived_images_stay_readable_under_original_path(tmp_path: Path) -> None:
+    channel_dir = tmp_path / "chemed"
+    channel_dir.mkdir()
+    old_image = channel_dir / "10.jpg"
+    old_image.write_bytes(b"old-jpeg")
+    os.utime(old_image, (datetime(2025, 11, 3).timestamp(),) * 2)
+    (channel_dir / "11.jpg").write_bytes(b"new-jpeg")
+
+    archives = archive_images(tmp_path, cutoff=date(2026, 1, 1))
+    assert [archive.name for archive in archives] == ["2025-11.zip"]
+    assert not old_image.exists()
+    assert sorted(path.name for path in iter_image_paths(tmp_path)) == ["10.jpg", "11.jpg"]
+    assert read_image_bytes(old_image) == b"old-jpeg"
+
+
+def test_streamed_jsonl_partitions_are_loaded_and_compacted(tmp_path: Path) -> None:
+    stream = partition_path(tmp_path, datetime(2025, 11, 3), "CheMed", "-stream", ".jsonl")
+    stream.write_text('{"message_id": 1}\n{"message_id": 2}\n', encoding="utf-8")
+    assert [record["message_id"] for record in read_json_records(tmp_path)] == [1, 2]
+    compact_messages(tmp_path, cutoff=date(2026, 1, 1))
+    assert not stream.exists()
+    assert [record["message_id"] for record in read_json_records(tmp_path)] == [1, 2]
+
+
+def test_archive_keeps_newer_loose_copy_and_existing_members(tmp_path: Path) -> None:
+    channel_dir = tmp_path / "chemed"
+    channel_dir.mkdir()
+    stamp = (datetime(2025, 11, 3).timestamp(),) * 2
+    for name, data in (("10.jpg", b"first"), ("12.jpg", b"other")):
+        (channel_dir / name).write_bytes(data)
+        os.utime(channel_dir / name, stamp)
+    archive_images(tmp_path, cutoff=date(2026, 1, 1))
+
+    redownload = channel_dir / "10.jpg"
+    redownload.write_bytes(b"newer")
+    os.utime(redownload, stamp)
+    archive_images(tmp_path, cutoff=date(2026, 1, 1))
+
+    assert redownload.read_bytes() == b"newer"
+    assert sorted(path.name for path in iter_image_paths(tmp_path)) == ["10.jpg", "12.jpg"]
+    assert read_image_bytes(channel_dir / "12.jpg") == b"other"
+    assert not list((channel_dir / "_archive").glob("*.tmp"))
@@ -0,0 +1,30 @@
+import json
+
+from src.load_to_postgres import compact_payload, message_params
+
+RECORD = {
+    "message_id": 7,
+    "channel_name": "CheMed",
+    "message_date": "2026-01-14T08:30:00+00:00",
+    "message_text": "Panadol 120 ETB",
+    "has_media": True,
+    "image_path": "data/raw/images/CheMed/7.jpg",
+    "views": 90,
+    "forwards": 1,
+    "media_type": "image/jpeg",
+    "image_width": 640,
+    "raw_file": "data/raw/telegram_messages/2026-01-14/chemed.json",
+}
+
+
+def test_compact_payload_keeps_only_unbroken_fields() -> None:
+    assert json.loads(compact_payload(RECORD)) == {"media_type": "image/jpeg", "image_width": 640}
+
+
+def test_compact_payload_is_null_when_everything_has_a_column() -> None:
+    record = {key: value for key, value in RECORD.items() if key not in ("media_type", "image_width")}
+    assert compact_payload(record) is None
+
+
+def test_full_payload_keeps_whole_record() -> None:
+    assert json.loads(message_params(RECORD, payload="full")["raw_payload"]) == RECORD
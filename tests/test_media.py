@@ -0,0 +1,30 @@
+import io
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+from src.media import is_image_media, normalize_image
+
+
+def _png_bytes(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 10, 10, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_normalize_image_bounds_size(tmp_path: Path) -> None:
+    dest = tmp_path / "chemed" / "42.jpg"
+    meta = normalize_image(_png_bytes(2000, 1000), dest, max_side=640)
+    assert (meta["image_width"], meta["image_height"]) == (640, 320)
+    assert meta["image_bytes"] == dest.stat().st_size
+    with Image.open(dest) as img:
+        assert img.format == "JPEG"
+        assert img.mode == "RGB"
+
+
+def test_is_image_media_skips_documents() -> None:
+    assert is_image_media(SimpleNamespace(photo=object(), document=None))
+    assert is_image_media(SimpleNamespace(photo=None, document=SimpleNamespace(mime_type="image/png")))
+    assert not is_image_media(SimpleNamespace(photo=None, document=SimpleNamespace(mime_type="video/mp4")))
+    assert not is_image_media(SimpleNamespace(photo=None, document=None))
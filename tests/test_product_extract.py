@@ -0,0 +1,36 @@
+from src.product_extract import build_automaton, extract_mentions, parse_prices
+
+LEXICON = {
+    "panadol": ("paracetamol", "analgesic"),
+    "panadol extra": ("paracetamol", "analgesic"),
+    "vitamin c": ("vitamin c", "supplement"),
+    "cipro": ("ciprofloxacin", "antibiotic"),
+}
+
+
+def test_parse_prices_handles_currency_before_and_after() -> None:
+    assert [value for _, value in parse_prices("Now 1,250 ETB, was Birr 1500.50")] == [1250.0, 1500.5]
+
+
+def test_parse_prices_drops_phone_numbers() -> None:
+    assert parse_prices("Tel 251911223344 ETB") == []
+
+
+def test_extract_mentions_prefers_longest_alias_and_pairs_prices() -> None:
+    mentions = extract_mentions("Panadol Extra 350 birr and Vitamin C 200 ETB", build_automaton(LEXICON))
+    assert [(m["product_name"], m["matched_text"], m["price_etb"]) for m in mentions] == [
+        ("paracetamol", "Panadol Extra", 350.0),
+        ("vitamin c", "Vitamin C", 200.0),
+    ]
+
+
+def test_extract_mentions_respects_word_boundaries() -> None:
+    assert extract_mentions("ciprofloxacin-free formula", build_automaton(LEXICON)) == []
+
+
+def test_extract_mentions_offsets_survive_length_changing_lowercase() -> None:
+    message = "İİ Panadol 100 ETB"
+    [mention] = extract_mentions(message, build_automaton(LEXICON))
+    assert mention["matched_text"] == "Panadol"
+    assert message[mention["char_offset"] :].startswith("Panadol")
+    assert mention["price_etb"] == 100.0
@@ -0,0 +1,105 @@
+import asyncio
+import queue
+from pathlib import Path
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src import scraper
+from src.scraper import discover_sessions
+
+
+def test_discover_sessions_strips_suffix(tmp_path: Path) -> None:
+    for name in ("worker_b.session", "worker_a.session", "notes.txt"):
+        (tmp_path / name).touch()
+    assert discover_sessions(tmp_path) == [tmp_path / "worker_a", tmp_path / "worker_b"]
+
+
+def test_drain_channel_queue_requeues_on_flood_wait(monkeypatch) -> None:
+    calls = []
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    class FakeScraper:
+        def __init__(self, session_path: Path) -> None:
+            self.flooded = False
+
+        async def __aenter__(self) -> "FakeScraper":
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            return None
+
+        async def scrape_channel(self, channel: str, days: int, limit: int, raise_on_flood: bool = False) -> None:
+            calls.append((channel, raise_on_flood))
+            if channel == "a" and not self.flooded:
+                self.flooded = True
+                raise FloodWaitError(request=None, capture=30)
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(scraper, "TelegramScraper", FakeScraper)
+    monkeypatch.setattr(scraper.asyncio, "sleep", fake_sleep)
+    channels: queue.Queue = queue.Queue()
+    channels.put(("a", 0))
+    channels.put(("b", 0))
+
+    asyncio.run(scraper.drain_channel_queue(Path("s1"), channels, days=1, limit=10, max_attempts=2, concurrency=1))
+
+    # "a" goes back behind "b"; its second and final attempt no longer raises on flood waits.
+    assert calls == [("a", True), ("b", True), ("a", False)]
+    assert sleeps and sleeps[0] == pytest.approx(30, abs=1)
+    assert channels.empty()
+
+
+def test_follow_reconnects_after_connection_error(monkeypatch) -> None:
+    calls = []
+    real_sleep = asyncio.sleep
+
+    class Stop(Exception):
+        pass
+
+    class FakeClient:
+        def __init__(self) -> None:
+            self.runs = 0
+            self.connects = 0
+
+        async def get_entity(self, channel: str) -> str:
+            return channel
+
+        def add_event_handler(self, handler, event) -> None:
+            calls.append("handler")
+
+        async def run_until_disconnected(self) -> None:
+            self.runs += 1
+            calls.append("run")
+            if self.runs == 1:
+                raise ConnectionError("network down")
+            raise Stop
+
+        async def connect(self) -> None:
+            self.connects += 1
+            calls.append("connect")
+            if self.connects == 1:
+                raise OSError("still down")
+
+        async def catch_up(self) -> None:
+            calls.append("catch_up")
+
+    class FakeScraper:
+        client = FakeClient()
+
+    async def fake_sleep(seconds: float) -> None:
+        await real_sleep(0)
+
+    monkeypatch.setattr(scraper, "get_peer_id", lambda entity: hash(entity))
+    monkeypatch.setattr(scraper, "channel_image_dir", lambda channel: Path(channel))
+    monkeypatch.setattr(scraper.asyncio, "sleep", fake_sleep)
+
+    with pytest.raises(Stop):
+        asyncio.run(scraper.follow(FakeScraper(), ["a"], batcher=None))
+
+    # The failed connect is retried before listening again, and missed updates are replayed.
+    assert calls == ["handler", "run", "connect", "connect", "catch_up", "run"]
@@ -0,0 +1,24 @@
+import asyncio
+from typing import List
+
+from src.streaming import MicroBatcher
+
+
+def test_micro_batcher_flushes_on_size_and_age() -> None:
+    batches: List[List[dict]] = []
+
+    async def sink(records: List[dict]) -> None:
+        batches.append(records)
+
+    async def scenario() -> None:
+        batcher = MicroBatcher(sink, batch_size=3, flush_seconds=0.05, max_pending=10)
+        task = asyncio.create_task(batcher.run())
+        for idx in range(4):
+            await batcher.put({"message_id": idx})
+        await asyncio.sleep(0.2)
+        await batcher.put({"message_id": 4})
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert [[r["message_id"] for r in batch] for batch in batches] == [[0, 1, 2], [3], [4]]
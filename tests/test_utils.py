@@ -10,3 +10,9 @@ def test_partition_path(tmp_path: Path) -> None:
     path = partition_path(root, dt, "CheMed")
     assert path.parent.name == "2026-01-14"
     assert path.name == "chemed.json"
+
+
+def test_partition_path_stream_file_per_channel_and_day(tmp_path: Path) -> None:
+    path = partition_path(tmp_path, datetime(2026, 1, 14, 9, 30), "CheMed", "-stream", ".jsonl")
+    assert path == tmp_path / "2026-01-14" / "chemed-stream.jsonl"
+    assert partition_path(tmp_path, datetime(2026, 1, 14, 23, 59), "CheMed", "-stream", ".jsonl") == path
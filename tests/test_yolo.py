@@ -1,3 +1,4 @@
+from src.yolo_backends import detections_match
 from src.yolo_detect import derive_category
 
 
@@ -15,3 +16,85 @@ def test_category_lifestyle() -> None:
 
 def test_category_other() -> None:
     assert derive_category([]) == "other"
+
+
+def test_detections_match_within_tolerance() -> None:
+    baseline = [("person", 0.91), ("bottle", 0.62)]
+    candidate = [("bottle", 0.6), ("person", 0.9)]
+    assert detections_match(baseline, candidate, tolerance=0.05)
+
+
+def test_detections_mismatch_on_labels_or_confidence() -> None:
+    assert not detections_match([("bottle", 0.6)], [("cup", 0.6)], tolerance=0.05)
+    assert not detections_match([("bottle", 0.9)], [("bottle", 0.7)], tolerance=0.05)
+
+
+def test_configure_threads_applies_latest_count(monkeypatch) -> None:
+    import onnxruntime
+
+    from src import yolo_backends
+
+    created = []
+
+    def fake_session(path, sess_options=None, *args, **kwargs):
+        created.append(sess_options.intra_op_num_threads)
+
+    monkeypatch.setattr(onnxruntime, "InferenceSession", fake_session)
+    monkeypatch.setattr(yolo_backends, "_ort_threads_patched", False)
+    monkeypatch.setattr(yolo_backends.torch, "set_num_threads", lambda threads: None)
+    yolo_backends.configure_threads(2)
+    onnxruntime.InferenceSession("model.onnx")
+    yolo_backends.configure_threads(4)
+    onnxruntime.InferenceSession("model.onnx")
+    assert created == [2, 4]
+
+
+def test_resolve_weights_quantizes_onnx_input(monkeypatch, tmp_path) -> None:
+    from src import yolo_backends
+
+    onnx_path = tmp_path / "yolov8n.onnx"
+    monkeypatch.setattr(yolo_backends, "quantize_int8", lambda path: path.with_name("q.onnx"))
+    assert yolo_backends.resolve_weights(onnx_path, "onnx-int8") == tmp_path / "q.onnx"
+    assert yolo_backends.resolve_weights(onnx_path, "onnx") == onnx_path
+
+
+def test_detect_image_rejects_undecodable_archived_image(monkeypatch, tmp_path) -> None:
+    import pytest
+
+    from src import yolo_detect
+
+    monkeypatch.setattr(yolo_detect, "read_image_bytes", lambda path: b"not-a-jpeg")
+    monkeypatch.setattr(yolo_detect, "predict", lambda *args: pytest.fail("predict must not run"))
+    with pytest.raises(ValueError):
+        yolo_detect.detect_image(None, tmp_path / "chemed" / "10.jpg", conf=0.35)
+
+
+def test_run_comparison_includes_archived_images(monkeypatch, tmp_path) -> None:
+    import os
+    from datetime import date, datetime
+
+    import cv2
+    import numpy as np
+
+    from src import yolo_detect
+    from src.compaction import archive_images
+
+    channel_dir = tmp_path / "chemed"
+    channel_dir.mkdir()
+    ok, encoded = cv2.imencode(".jpg", np.zeros((8, 8, 3), dtype=np.uint8))
+    (channel_dir / "10.jpg").write_bytes(encoded.tobytes())
+    os.utime(channel_dir / "10.jpg", (datetime(2025, 11, 3).timestamp(),) * 2)
+    archive_images(tmp_path, cutoff=date(2026, 1, 1))
+    (channel_dir / "11.jpg").write_bytes(encoded.tobytes())
+
+    seen = []
+
+    def fake_compare(sources, *args):
+        seen.extend(sources)
+        return []
+
+    monkeypatch.setattr(yolo_detect, "compare_backends", fake_compare)
+    yolo_detect.run_comparison(tmp_path, tmp_path / "yolov8n.pt", 0.35, 0, sample=10, tolerance=0.05)
+
+    assert isinstance(seen[0], np.ndarray)
+    assert seen[1] == str(channel_dir / "11.jpg")
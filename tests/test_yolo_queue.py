@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+
+from src import yolo_queue
+
+
+class FakeConnection:
+    def __init__(self, log: List[tuple]) -> None:
+        self.log = log
+
+    def execute(self, sql, params=None):
+        self.log.append((str(sql), params))
+
+
+class FakeEngine:
+    def __init__(self) -> None:
+        self.log: List[tuple] = []
+
+    @contextmanager
+    def begin(self):
+        yield FakeConnection(self.log)
+
+
+def test_run_worker_splits_done_and_failed_jobs(monkeypatch, tmp_path: Path) -> None:
+    engine = FakeEngine()
+    batches = [[("chemed/1.jpg", 1), ("chemed/2.jpg", 1), ("chemed/3.jpg", 3)], []]
+    inserted: List[dict] = []
+
+    monkeypatch.setattr(yolo_queue, "get_engine", lambda: engine)
+    monkeypatch.setattr(yolo_queue, "ensure_job_table", lambda *args: None)
+    monkeypatch.setattr(yolo_queue, "ensure_table", lambda *args: None)
+    monkeypatch.setattr(yolo_queue, "requeue_expired", lambda *args: 0)
+    monkeypatch.setattr(yolo_queue, "claim_batch", lambda *args: batches.pop(0))
+    monkeypatch.setattr(yolo_queue, "insert_detections", lambda conn, schema, table, rows: inserted.extend(rows))
+
+    def process(image_path: Path) -> List[dict]:
+        if image_path.name != "1.jpg":
+            raise ValueError("undecodable")
+        return [{"image_path": str(image_path), "label": "bottle"}]
+
+    processed = yolo_queue.run_worker(process, "raw", "yolo_jobs", "image_detections", "w1", tmp_path)
+
+    assert processed == 1
+    assert inserted == [{"image_path": "chemed/1.jpg", "label": "bottle"}]
+    updates = {sql.split("set status = ")[1].split(",")[0].strip(): params for sql, params in engine.log}
+    assert [job["image_path"] for job in updates["'done'"]] == ["chemed/1.jpg"]
+    failed = {job["image_path"]: job["status"] for job in updates[":status"]}
+    # Attempt 1 of 3 goes back to the queue; the job on its last attempt is marked failed.
+    assert failed == {"chemed/2.jpg": "pending", "chemed/3.jpg": "failed"}